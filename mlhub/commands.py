@@ -29,24 +29,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import distro
-import glob
+import argparse
+import contextlib
 import json
 import logging
 import mlhub.utils as utils
 import os
 import re
+import shlex
 import shutil
 import subprocess
 import sys
-import tempfile
 import textwrap
-import urllib.request
-import yaml
+from concurrent.futures import ThreadPoolExecutor
 from mlhub.pkg import generalkey
 import mlhub.constants as constants
 
-from distutils.version import StrictVersion
 from mlhub.constants import (
     BASH_CMD,
     EXT_MLM,
@@ -55,6 +53,50 @@ from mlhub.constants import (
 )
 
 
+# Patterns used by dispatch to recognise why a model script failed.
+
+# They match the raw bytes of the script's stderr so that it only has
+# to be decoded when it is reported.
+
+RE_PY_MISSING = re.compile(rb"ModuleNotFoundError: No module named '(.*)'")
+RE_R_MISSING = re.compile("there is no package called ‘(.*)’".encode("utf-8"))
+DATA_MISSING = b"mlhub.utils.DataResourceNotFoundException"
+
+# Shared by every call to list_model_commands() rather than building a new
+# wrapper each time, as textwrap.fill() does.
+
+_WRAPPER = textwrap.TextWrapper(width=75)
+
+# Installer kind and source for each dependency category in MLHUB.yaml,
+# see configure_model.  Other spellings are handled by dep_category.
+
+DEP_CATEGORIES = {
+    "system": ("system", None),
+    "sh": ("system", None),
+    "shell": ("system", None),
+    "r": ("r", "cran"),
+    "cran": ("r", "cran"),
+    "github": ("r", "github"),
+    "python": ("python", "python"),
+    "python3": ("python", "python3"),
+    "pip": ("python", "pip"),
+    "pip3": ("python", "pip3"),
+    "conda": ("python", "conda"),
+    "files": ("files", None),
+}
+
+# Script extension for each way the 'languages' field of a model is
+# written, keyed by the field stripped and lower cased.
+
+LANG_SCRIPT_EXT = {
+    "python": "py",
+    "python3": "py",
+    "py": "py",
+    "r": "R",
+    "rscript": "R",
+}
+
+
 # The commands are implemented here in a logical order with each
 # command providing a suggesting of the following command.
 
@@ -89,8 +131,7 @@ def list_available(args):
     # Provide some context.
 
     if not args.quiet:
-        msg = "The repository '{}' provides the following models:\n"
-        print(msg.format(repo))
+        print(f"The repository '{repo}' provides the following models:\n")
 
     # List the meta data.
 
@@ -122,22 +163,20 @@ def list_installed(args):
     # Find installed models, ignoring special folders like R.
 
     init = utils.get_init_dir()
-    if os.path.exists(init):
+    try:
+        with os.scandir(init) as it:
+            models = sorted(
+                e.name
+                for e in it
+                if e.is_dir()
+                and e.name != "R"
+                and not e.name.startswith((".", "_"))
+            )
         msg = f" in '{init}'."
-        models = [
-            f
-            for f in os.listdir(init)
-            if os.path.isdir(os.path.join(init, f))
-               and f != "R"
-               and not f.startswith(".")
-               and not f.startswith("_")
-        ]
-    else:
+    except FileNotFoundError:
         msg = f". '{init}' does not exist."
         models = []
 
-    models.sort()
-
     # Only list model names
 
     if args.name_only:
@@ -155,35 +194,54 @@ def list_installed(args):
     if mcnt > 0:
         print("")
 
-    invalid_models = []
-    for p in models:
+    # Loading each description is independent file I/O and parsing so
+    # overlap them in a small pool of threads, then report sequentially
+    # to keep the output ordered.
+
+    def _load(model):
         try:
-            entry = utils.load_description(p)
-            utils.print_meta_line(entry)
+            return utils.load_description(model)
         except (
                 utils.DescriptionYAMLNotFoundException,
                 utils.MalformedYAMLException,
                 KeyError,
         ):
+            return None
+
+    entries = []
+    if mcnt > 0:
+        with ThreadPoolExecutor(max_workers=min(16, mcnt)) as executor:
+            entries = list(executor.map(_load, models))
+
+    invalid_models = []
+    commands = set()
+    for p, entry in zip(models, entries):
+        try:
+            if entry is not None:
+                utils.print_meta_line(entry)
+        except KeyError:
+            entry = None
+
+        if entry is None:
             mcnt -= 1
             invalid_models.append(p)
             continue
 
-        # Update bash completion list.
-
         if "commands" in entry:
-            utils.update_command_completion(set(entry["commands"]))
+            commands.update(entry["commands"])
+
+    # Update bash completion list once for all models.
+
+    if commands:
+        utils.update_command_completion(commands)
 
     invalid_mcnt = len(invalid_models)
     if invalid_mcnt > 0:
+        plural, verb = ("s", "are") if invalid_mcnt > 1 else ("", "is")
         print(
-            "\nOf which {} model package{} {} broken:\n".format(
-                invalid_mcnt,
-                "s" if invalid_mcnt > 1 else "",
-                "are" if invalid_mcnt > 1 else "is",
-            )
+            f"\nOf which {invalid_mcnt} model package{plural} {verb} broken:\n"
         )
-        print("  ====> \033[31m" + ", ".join(invalid_models) + "\033[0m")
+        print(f"  ====> \033[31m{', '.join(invalid_models)}\033[0m")
         print(utils.get_command_suggestion("remove"))
 
     # Suggest next step.
@@ -209,6 +267,8 @@ def install_model(args):
                           like mlhubber/audit:doc/MLHUB.yaml.
     """
 
+    import urllib.request
+
     logger = logging.getLogger(__name__)
     logger.info("Install a model.")
     logger.debug(f"args: {args}")
@@ -322,7 +382,9 @@ def install_model(args):
     # Installation.
 
     entry = None  # Meta info read from MLHUB.yaml
-    with tempfile.TemporaryDirectory() as mlhubtmpdir:
+    pkgsize = None  # Total size of the files unpacked from the archive
+    names = None  # Names of the files unpacked from the archive
+    with utils.create_tmp_dir() as mlhubtmpdir:
 
         # Determine the local path of the model package
 
@@ -352,37 +414,48 @@ def install_model(args):
                         location
                 ):  # Download the package file because it is not from GitHub.
                     utils.download_model_pkg(
-                        location, local, pkgfile, args.quiet
+                        location, local, pkgfile, args.quiet,
+                        cache=not args.no_cache,
                     )
 
                 if not args.quiet:
                     print("Extracting '{}' ...\n".format(pkgfile))
 
-                utils.unpack_with_promote(
-                    local, uncompressdir, valid_name=pkgfile
+                _, _, names, pkgsize = utils.unpack_with_promote(
+                    local,
+                    uncompressdir,
+                    valid_name=pkgfile,
+                    defer_size=constants.DEFER_EXTRACT_SIZE,
                 )
                 mlhubyaml = utils.get_available_pkgyaml(
-                    uncompressdir
+                    uncompressdir, names
                 )  # Path to MLHUB.yaml
 
             elif maybe_private:
 
-                identity_env = (
-                    "GIT_SSH_COMMAND='ssh -i {}' ".format(key) if key else ""
-                )
-                command = "cd {}; {}git clone {}; cd {}; git checkout {}".format(
-                    mlhubtmpdir,
-                    identity_env,
-                    repo_obj.get_ssh_clone_url(),
-                    repo_obj.repo,
-                    repo_obj.ref,
-                )
-                proc = subprocess.Popen(
-                    command, shell=True, stderr=subprocess.PIPE, stdout=subprocess.PIPE
-                )
-                output, errors = proc.communicate()
-                if proc.returncode != 0:
-                    raise utils.InstallFailedException(errors.decode("utf-8"))
+                # Clone the repository and check out the reference, if
+                # any, without going through a shell.
+
+                env = dict(os.environ)
+                if key:
+                    env["GIT_SSH_COMMAND"] = "ssh -i '{}'".format(key)
+                commands = [
+                    (["git", "clone", repo_obj.get_ssh_clone_url()],
+                     mlhubtmpdir)
+                ]
+                if repo_obj.ref is not None:
+                    commands.append(
+                        (["git", "checkout", repo_obj.ref],
+                         os.path.join(mlhubtmpdir, repo_obj.repo))
+                    )
+                for command, cwd in commands:
+                    proc = subprocess.run(
+                        command, cwd=cwd, env=env, capture_output=True
+                    )
+                    if proc.returncode != 0:
+                        raise utils.InstallFailedException(
+                            proc.stderr.decode("utf-8")
+                        )
 
                 if repo_obj.path:
                     mlhubyaml = os.path.join(uncompressdir, repo_obj.path)
@@ -405,16 +478,18 @@ def install_model(args):
 
         install_path = utils.get_package_dir(model)  # Installation path
         if os.path.exists(install_path):
-            installed_version = utils.load_description(model)["meta"][
-                "version"
-            ]
+            if not YES:
+                installed_version = utils.load_description(model)["meta"][
+                    "version"
+                ]
 
-            # Ensure version number is string.
+                # Ensure version number is string.
 
-            installed_version = str(installed_version)
-            version = str(version)
-            if not YES:
-                if StrictVersion(installed_version) > StrictVersion(version):
+                installed_version = str(installed_version)
+                version = str(version)
+                installed_key = utils.version_key(installed_version)
+                version_key = utils.version_key(version)
+                if installed_key > version_key:
                     yes = utils.yes_or_no(
                         "Downgrade '{}' from version '{}' to version '{}'",
                         model,
@@ -422,7 +497,7 @@ def install_model(args):
                         version,
                         yes=True,
                     )
-                elif StrictVersion(installed_version) == StrictVersion(version):
+                elif installed_key == version_key:
                     yes = utils.yes_or_no(
                         "Replace '{}' version '{}' with version '{}'",
                         model,
@@ -454,12 +529,20 @@ def install_model(args):
                 uncompressdir
         ):  # Model pkg mlm or GitHub pkg has not unzipped yet.
             if utils.is_url(location):  # Download the package file if needed.
-                utils.download_model_pkg(location, local, pkgfile, args.quiet)
+                utils.download_model_pkg(
+                    location, local, pkgfile, args.quiet,
+                    cache=not args.no_cache,
+                )
 
             if not args.quiet:
                 print("Extracting '{}' ...\n".format(pkgfile))
 
-            utils.unpack_with_promote(local, uncompressdir, valid_name=pkgfile)
+            _, _, names, pkgsize = utils.unpack_with_promote(
+                local,
+                uncompressdir,
+                valid_name=pkgfile,
+                defer_size=constants.DEFER_EXTRACT_SIZE,
+            )
 
         # Install package files.
         #
@@ -472,7 +555,9 @@ def install_model(args):
         if (
                 mlhubyaml is None
         ):  # MLM file which can obtain version number from it name.
-            mlhubyaml = utils.get_available_pkgyaml(uncompressdir)
+            mlhubyaml = utils.get_available_pkgyaml(uncompressdir, names)
+            entry = utils.read_mlhubyaml(mlhubyaml)
+        elif entry is None:  # Version number was given by the repo.
             entry = utils.read_mlhubyaml(mlhubyaml)
 
         depspec = None
@@ -491,23 +576,28 @@ def install_model(args):
                 file_spec is not None
         ):  # install package files if they are specified in MLHUB.yaml
 
+            # Only some of the unpacked files are installed so the
+            # installed size needs to be measured.  They are picked from
+            # all of the files so any left in the archive are needed.
+
+            pkgsize = None
+            utils.extract_deferred(uncompressdir)
+
             # MLHUB.yaml should always be at the package root.
 
             os.mkdir(install_path)
             if utils.is_url(
                     mlhubyaml
             ):  # We currently only support MLHUB.yaml specified on GitHub.
+                yaml_url = mlhubyaml
                 if mlhubyaml.startswith("https://api"):
-                    urllib.request.urlretrieve(
-                        json.loads(urllib.request.urlopen(mlhubyaml).read())[
-                            "download_url"
-                        ],
-                        os.path.join(install_path, MLHUB_YAML),
-                    )
-                else:
-                    urllib.request.urlretrieve(
-                        mlhubyaml, os.path.join(install_path, MLHUB_YAML)
-                    )
+                    yaml_url = json.loads(
+                        urllib.request.urlopen(mlhubyaml).read()
+                    )["download_url"]
+                if not utils.download_url(
+                        yaml_url, os.path.join(install_path, MLHUB_YAML)
+                ):
+                    raise utils.YAMLFileAccessException(yaml_url)
             else:
                 shutil.move(mlhubyaml, install_path)
 
@@ -530,13 +620,20 @@ def install_model(args):
             # Otherwise, put all files under package dir.
             # **Note** Here we must make sure <install_path> does not exist.
             # Otherwise, <unzipdir> will be inside <install_path>
-            shutil.move(uncompressdir, install_path)
+            #
+            # The tmp dir is inside the init dir so this is normally a
+            # rename, falling back to a copy across filesystems.
+            try:
+                os.rename(uncompressdir, install_path)
+            except OSError:
+                shutil.move(uncompressdir, install_path)
 
-        # Update bash completion list.
+        # Update bash completion list from the description already read
+        # rather than parsing the installed copy again, and keep it for
+        # the commands that follow.
 
-        utils.update_command_completion(
-            set(utils.load_description(model)["commands"])
-        )
+        utils.update_command_completion(set(entry["commands"]))
+        utils.cache_description(model, entry)
 
         # Update working dir if any.
 
@@ -545,9 +642,14 @@ def install_model(args):
 
         if not args.quiet:
             # Informative message about the size of the installed model.
+            # Use the size recorded in the archive when the whole of it
+            # was installed rather than walking the installed tree.
+
+            if pkgsize is None:
+                pkgsize = utils.dir_size(install_path)
 
             msg = f"Found '{model}' version {version}.\n\nInstalled '{model}' "
-            msg += f"into '{install_path}/' ({utils.dir_size(install_path):,} bytes)."
+            msg += f"into '{install_path}/' ({pkgsize:,} bytes)."
             print(msg)
 
             # Suggest next step. README or DOWNLOAD
@@ -600,12 +702,10 @@ def readme(args):
     logger = logging.getLogger(__name__)
     logger.info("Get README of {}.".format(model))
 
-    path = utils.get_package_dir(model)
-    readme_file = os.path.join(path, README)
-
     # Check that the model is installed.
 
-    utils.check_model_installed(model)
+    path = utils.check_model_installed(model)
+    readme_file = os.path.join(path, README)
 
     # Display the README.
 
@@ -618,30 +718,37 @@ def readme(args):
             if not os.path.exists(readme_raw):
                 raise utils.ModelReadmeNotFoundException(model, readme_file)
 
-        script = os.path.join(
-            os.path.dirname(__file__), "scripts", "convert_readme.sh"
-        )
-        command = "{} {} {} {}".format(BASH_CMD, script, readme_raw, README)
-        proc = subprocess.Popen(
-            command, shell=True, cwd=path, stderr=subprocess.PIPE
-        )
-        output, errors = proc.communicate()
-        if proc.returncode != 0:
-            errors = errors.decode("utf-8")
-            command_not_found = re.compile(r"\d: (.*):.*not found").search(
-                errors
+        try:
+            proc = subprocess.run(
+                ["pandoc", "-t", "plain", readme_raw],
+                cwd=path,
+                capture_output=True,
+                text=True,
             )
-            if command_not_found is not None:
-                raise utils.LackPrerequisiteException(
-                    command_not_found.group(1)
-                )
+        except FileNotFoundError:
+            raise utils.LackPrerequisiteException("pandoc")
 
+        if proc.returncode != 0:
             print("An error was encountered:\n")
-            print(errors)
+            print(proc.stderr)
             raise utils.ModelReadmeNotFoundException(model, readme_file)
 
+        with open(readme_file, "w") as f:
+            f.write(utils.trim_readme(proc.stdout))
+
+    # Copy the README a line at a time, holding back newlines until more
+    # text follows so that those at the end are dropped.
+
     with open(readme_file, "r") as f:
-        print(utils.drop_newline(f.read()))
+        newlines = ""
+        for line in f:
+            text = line.rstrip("\n")
+            if text:
+                sys.stdout.write(newlines + text)
+                newlines = line[len(text):]
+            else:
+                newlines += line
+    print()
 
     # Suggest next step.
 
@@ -700,7 +807,7 @@ def list_model_commands(args):
 
     msg += "supports the following commands:"
     msg = msg.format(model, title)
-    msg = textwrap.fill(msg, width=75)
+    msg = _WRAPPER.fill(msg)
     print(msg)
 
     for cmd in commands:
@@ -724,6 +831,8 @@ def list_model_commands(args):
 def configure_model(args):
     """Ensure the user's environment is configured."""
 
+    import urllib.request
+
     # TODO: Add support for additional configuration if any except those
     #       specified in MLHUB.yaml.
     # TODO: When fail, print out the failed dep, as well as installed
@@ -778,10 +887,14 @@ def configure_model(args):
         # Configure MLHUB itself.
         # Includes bash completion and system pre-requisites
 
-        if distro.id() in ["debian", "ubuntu"]:
+        if utils.host_id() in ["debian", "ubuntu"]:
             path = os.path.dirname(__file__)
+            refresh = utils.completion_outdated(path)
             env_var = "export _MLHUB_OPTION_YES='y'; " if YES else ""
             env_var += 'export _MLHUB_PYTHON_EXE="{}"; '.format(sys.executable)
+            env_var += 'export _MLHUB_COMPLETION_INSTALL_PATH="{}"; '.format(
+                constants.COMPLETION_INSTALL_PATH
+            )
             script = os.path.join("scripts", "dep", "mlhub.sh")
             command = "{}{} {}".format(env_var, BASH_CMD, script)
             proc = subprocess.Popen(
@@ -791,6 +904,13 @@ def configure_model(args):
             if proc.returncode != 0:
                 raise utils.ConfigureFailedException(errors.decode("utf-8"))
 
+            # Fill the model and command completion lists, as running
+            # 'ml available' and 'ml installed' would, without starting
+            # another two interpreters.
+
+            if refresh:
+                refresh_completion()
+
         return
 
     # Model package configuration.
@@ -803,13 +923,13 @@ def configure_model(args):
     if matched_model is not None:
         model = matched_model
 
-    # Setup.
+    # Check if the model package is installed.
 
-    pkg_dir = utils.get_package_dir(model)
+    pkg_dir = utils.check_model_installed(model)
 
-    # Check if the model package is installed.
+    # Extract any large files left in the package archive at install.
 
-    utils.check_model_installed(model)
+    utils.extract_deferred(pkg_dir)
 
     # Install key and dependencies specified in MLHUB.yaml
 
@@ -903,38 +1023,25 @@ def configure_model(args):
                         deplist, model, source="pip", yes=YES
                     )
 
-            # ----- System deps -----
-
-            elif category == "system" or "shell".startswith(category):
-                utils.install_system_deps(deplist, yes=YES)
-
-            # ----- R deps -----
-
-            elif category == "r":
-                utils.install_r_deps(deplist, model, source="cran", yes=YES)
-
-            elif (
-                    category == "cran"
-                    or category == "github"
-                    or category.startswith("cran-")
-            ):
-                utils.install_r_deps(deplist, model, source=category, yes=YES)
-
-            # ----- Python deps -----
-
-            elif (
-                    category.startswith("python")
-                    or category.startswith("pip")
-                    or category == "conda"
-            ):
-                utils.install_python_deps(
-                    deplist, model, source=category, yes=YES
-                )
+            # ----- System, R, Python and file deps by category -----
 
-            # ----- Files -----
+            else:
+                kind, source = dep_category(category)
 
-            elif "files".startswith(category):
-                utils.install_file_deps(deplist, model, key=args.i, yes=YES)
+                if kind == "system":
+                    utils.install_system_deps(deplist, yes=YES)
+                elif kind == "r":
+                    utils.install_r_deps(
+                        deplist, model, source=source, yes=YES
+                    )
+                elif kind == "python":
+                    utils.install_python_deps(
+                        deplist, model, source=source, yes=YES
+                    )
+                elif kind == "files":
+                    utils.install_file_deps(
+                        deplist, model, key=args.i, yes=YES
+                    )
 
     # Run additional configure script if any.
 
@@ -949,6 +1056,9 @@ def configure_model(args):
                 "The following dependencies are required:\n"
             )
             print(msg)
+
+            import yaml
+
             print(yaml.dump(depspec))
         else:
             print("No configuration provided (maybe none is required).")
@@ -964,6 +1074,52 @@ def configure_model(args):
         utils.print_next_step("configure", model=model)
 
 
+def refresh_completion():
+    """Refresh the bash completion lists of models and their commands."""
+
+    # As with the 'ml available' and 'ml installed' the configure script
+    # used to run, a failure only leaves a list stale and is not fatal.
+
+    logger = logging.getLogger(__name__)
+    quiet = argparse.Namespace(mlhub=None, name_only=False, quiet=True)
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            for refresh in (list_available, list_installed):
+                try:
+                    refresh(quiet)
+                except Exception:
+                    logger.error(
+                        "Failed to refresh the completion list with {}".format(
+                            refresh.__name__
+                        ),
+                        exc_info=True,
+                    )
+
+
+def dep_category(category):
+    """Return the installer kind and source for a dependency category.
+
+The common categories are looked up directly.  Otherwise fall back to
+the prefix rules: abbreviations of 'shell' and 'files', dated CRAN
+snapshots like 'cran-2018-12-01', and any 'python*' or 'pip*' variant.
+Returns (None, category) for an unknown category.
+    """
+
+    if category in DEP_CATEGORIES:
+        return DEP_CATEGORIES[category]
+
+    if "shell".startswith(category):
+        return "system", None
+    if category.startswith("cran-"):
+        return "r", category
+    if category.startswith(("python", "pip")):
+        return "python", category
+    if "files".startswith(category):
+        return "files", None
+
+    return None, category
+
+
 # -----------------------------------------------------------------------
 # DISPATCH
 # ------------------------------------------------------------------------
@@ -974,9 +1130,6 @@ def dispatch(args):
 
     cmd = args.cmd
     model = args.model
-    path = utils.get_package_dir(model)
-
-    param = " ".join(args.param)
 
     # Get working dir if any.
 
@@ -993,7 +1146,7 @@ def dispatch(args):
 
     # Check that the model is installed and has commands.
 
-    utils.check_model_installed(model)
+    path = utils.check_model_installed(model)
 
     entry = utils.load_description(model)
 
@@ -1030,34 +1183,34 @@ or else connect to the server's desktop using a local X server like X2Go.
 
     # Deal with malformed 'languages' field
 
-    lang_opts = {"python": "py", "R": "R"}
-    for k in list(lang_opts):
-        if lang in k:
-            lang = lang_opts[k]
-            break
+    lang = LANG_SCRIPT_EXT.get(str(lang).strip().lower(), lang)
 
     # Obtain the specified script file.
 
     script = cmd + "." + lang
+    script_path = os.path.join(path, script)
 
     logger = logging.getLogger(__name__)
-    logger.debug("Execute the script: " + os.path.join(path, script))
+    logger.debug("Execute the script: " + script_path)
 
-    if cmd not in list(entry["commands"]) or not os.path.exists(
-            os.path.join(path, script)
-    ):
+    if cmd not in entry["commands"] or not os.path.exists(script_path):
         raise utils.CommandNotFoundException(cmd, model)
 
     # Determine the interpreter to use
     #
     # .R => Rscript; .py => python, etc.
 
-    interpreter = utils.interpreter(script)
+    interpreter, interpreter_env = utils.interpreter_cmd(script)
+
+    # Extract any large files left in the package archive at install,
+    # before path is changed to the working dir.
+
+    utils.extract_deferred(path)
 
     # Change working dir if needed
 
     if args.working_dir is not None:
-        script = os.path.join(path, script)
+        script = script_path
         path = args.working_dir
 
     # _MLHUB_CMD_CWD: a environment variable indicates current working
@@ -1068,71 +1221,81 @@ or else connect to the server's desktop using a local X server like X2Go.
     # as utils.get_cmd_cwd().  And model package developer should be
     # use the helper function instead of the env vars directly.
 
-    env_var = "export _MLHUB_CMD_CWD='{}'; ".format(os.getcwd())
-    env_var += "export _MLHUB_MODEL_NAME='{}'; ".format(model)
-    env_var += (
-        'export _MLHUB_PYTHON_EXE="{}"; '.format(sys.executable)
-        if not conda_env_name
-        else ""
-    )
-    if not conda_env_name and script.endswith(
-            "py"
-    ):  # Handle python environment
-        env_var += utils.get_py_pkg_path_env(model)
+    #
+    # The script is run directly, without a shell, so the parameters
+    # are passed through exactly as given on the command line.
+
+    env = dict(os.environ)
+    env["_MLHUB_CMD_CWD"] = os.getcwd()
+    env["_MLHUB_MODEL_NAME"] = model
+
+    if conda_env_name is None:
+        env["_MLHUB_PYTHON_EXE"] = sys.executable
+        env.update(interpreter_env)
+        if script.endswith("py"):  # Handle python environment
+            python_pkg_base, python_pkg_bin = utils.get_py_pkg_paths(model)
+            env["PATH"] = os.pathsep.join(
+                [python_pkg_bin, env.get("PATH", "")]
+            )
+            env["PYTHONPATH"] = python_pkg_base
+        command = interpreter + [script] + args.param
+    else:
 
-    command = "{}{} {} {}".format(
-        env_var, interpreter if not conda_env_name else "python", script, param
+        # Run script inside conda environment if specified.  The
+        # environment name and the command are passed to the shell as
+        # positional parameters so no quoting is needed.
+
+        command = [
+            BASH_CMD,
+            "-ic",
+            'conda activate "$1"; shift; exec "$@"',
+            BASH_CMD,
+            conda_env_name,
+            "python",
+            script,
+        ] + args.param
+
+    logger.debug(
+        "(cd " + shlex.quote(path) + "; "
+        + " ".join(shlex.quote(arg) for arg in command) + ")"
     )
 
-    # Run script inside conda environment if specified
-
-    if conda_env_name is not None:
-        command = '{} -ic "conda activate {}; {}"'.format(
-            BASH_CMD, conda_env_name, command
-        )
-
-    logger.debug("(cd " + path + "; " + command + ")")
+    # The script's stderr is shown once it exits and its end is kept to
+    # recognise why the script failed.
 
-    proc = subprocess.Popen(command, shell=True, cwd=path)
-    output, errors = proc.communicate()
+    returncode, errors = utils.run_with_stderr_tail(command, cwd=path, env=env)
     missing_r_dep = False
-    if proc.returncode != 0 and errors:
-        errors = errors.decode("utf-8")
+    if returncode != 0 and errors:
 
         # Check if it is Python dependency unsatisfied
 
-        dep_required = re.compile(
-            r"ModuleNotFoundError: No module named '(.*)'"
-        ).search(errors)
+        dep_required = RE_PY_MISSING.search(errors)
 
         # Check if R dependency unsatisfied
 
         if dep_required is None:
-            dep_required = re.compile(
-                r"there is no package called ‘(.*)’"
-            ).search(errors)
+            dep_required = RE_R_MISSING.search(errors)
             if dep_required is not None:
                 missing_r_dep = True
 
         # Check if required data resource not found
 
-        data_required = re.compile(
-            r"mlhub.utils.DataResourceNotFoundException"
-        ).search(errors)
+        data_required = DATA_MISSING in errors
+
+        errors = errors.decode("utf-8", errors="replace")
 
         if dep_required is not None:  # Dependency unsatisfied
-            dep_required = dep_required.group(1)
+            dep_required = dep_required.group(1).decode("utf-8")
             logger.error(
                 "Dependency unsatisfied: {}\n{}".format(dep_required, errors)
             )
             raise utils.LackDependencyException(
                 dep_required, missing_r_dep, model
             )
-        elif data_required is not None:  # Data not found
+        elif data_required:  # Data not found
             raise utils.DataResourceNotFoundException()
-        else:  # Other unknown errors
-            print("An error was encountered:\n")
-            print(errors)
+
+        # Other errors have already been shown with the script's stderr.
 
     else:
         # Suggest next step - in the context of the command line view
@@ -1162,12 +1325,37 @@ def donate(args):
 def remove_mlm(args):
     f"""Remove downloaded {EXT_MLM} files."""
 
-    mlm = glob.glob(os.path.join(utils.get_init_dir(), "*.mlm"))
-    mlm.sort()
+    try:
+        with os.scandir(utils.get_init_dir()) as it:
+            mlm = sorted(
+                e.path
+                for e in it
+                if e.name.endswith(EXT_MLM)
+                and not e.name.startswith(".")
+                and e.is_file()
+            )
+    except FileNotFoundError:
+        mlm = []
+
+    # Offer to remove them all at once before asking about each one.
+
+    if len(mlm) > 1:
+        msg = "Remove all {} model package archives in '{}'"
+        if utils.yes_or_no(msg, len(mlm), utils.get_init_dir(), yes=True):
+            for m in mlm:
+                os.remove(m)
+            mlm = []
+
     for m in mlm:
         if utils.yes_or_no("Remove model package archive '{}'", m, yes=True):
             os.remove(m)
 
+    cache = constants.DOWNLOAD_CACHE_DIR
+    if os.path.isdir(cache):
+        msg = "Remove cached model package downloads in '{}'"
+        if utils.yes_or_no(msg, cache, yes=True):
+            shutil.rmtree(cache)
+
 
 # ------------------------------------------------------------------------
 # REMOVE
@@ -1206,14 +1394,13 @@ def remove_model(args):
         if matched_model is not None:
             model = matched_model
 
-        path = utils.get_package_dir(model)
-        if os.path.exists(utils.get_package_cache_dir(model)):
-            cache = utils.get_package_cache_dir(model)
-        msg = "Remove '{}/'"
-
         # Check that the model is installed.
 
-        utils.check_model_installed(model)
+        path = utils.check_model_installed(model)
+        cache = utils.get_package_cache_dir(model)
+        if not os.path.isdir(cache):
+            cache = None
+        msg = "Remove '{}/'"
 
     if YES:
 
@@ -1225,6 +1412,10 @@ def remove_model(args):
         if os.path.exists(path):
             shutil.rmtree(path)
 
+        # Remove cached package description as well without ask
+        if model is not None:
+            utils.remove_file_or_dir(utils.get_description_cache_file(model))
+
     else:
 
         if utils.yes_or_no(msg, path, yes=False, certain=True):
@@ -1239,6 +1430,13 @@ def remove_model(args):
             if os.path.exists(path):
                 shutil.rmtree(path)
 
+            # Remove cached package description as well without ask
+
+            if model is not None:
+                utils.remove_file_or_dir(
+                    utils.get_description_cache_file(model)
+                )
+
             # Ask if remove cached files
 
             if cache is not None and utils.yes_or_no(
@@ -1271,9 +1469,7 @@ If the NEW already exists it is overwritten only if --force.
     old = args.old
     new = args.new
 
-    utils.check_model_installed(old)
-
-    oldp = utils.get_package_dir(old)
+    oldp = utils.check_model_installed(old)
     newp = utils.get_package_dir(new)
 
     if os.path.exists(newp):
@@ -1284,7 +1480,9 @@ If the NEW already exists it is overwritten only if --force.
 
     os.rename(oldp, newp)
 
-    yfile = f"{newp}/{constants.MLHUB_YAML}"
+    yfile = os.path.join(newp, constants.MLHUB_YAML)
+
+    import yaml
 
     with open(yfile) as file:
         ydata = yaml.load(file, Loader=yaml.FullLoader)
@@ -28,19 +28,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import collections
+import functools
 import logging
 import os
+import types
 
 # ------------------------------------------------------------------------
 # The default ML Hub can be overridden by an environment variable or by
 # the command line option --mlhub.
 # ------------------------------------------------------------------------
 
-MLHUB = "https://mlhub.au/"
-if "MLHUB" in os.environ:
-    # The following adds a trailing "/" as assumed in the code.
-    MLHUB = os.path.join(os.getenv("MLHUB"), "")
+# MLHUB is a URL rather than a local path, so it always takes a "/" as
+# the trailing separator assumed in the code.
+
+MLHUB = os.environ.get("MLHUB", "https://mlhub.au/").rstrip("/") + "/"
 
 HUB_PATH = "pool/main/"
 
@@ -49,10 +50,14 @@ HUB_PATH = "pool/main/"
 # files.
 # ------------------------------------------------------------------------
 
-MLINIT = os.path.expanduser("~/.mlhub/")
-if "MLINIT" in os.environ:
+# The home directory is only looked up when MLINIT is not set.
+
+MLINIT = os.environ.get("MLINIT")
+if MLINIT is None:
+    MLINIT = os.path.expanduser("~/.mlhub/")
+else:
     # The following adds a trailing "/" as assumed in the code.
-    MLINIT = os.path.join(os.getenv("MLINIT"), "")
+    MLINIT = os.path.join(MLINIT, "")
 
 # Cache files for bash completion.
 
@@ -61,6 +66,7 @@ COMPLETION_COMMANDS = os.path.join(COMPLETION_DIR, "commands")
 COMPLETION_MODELS = os.path.join(COMPLETION_DIR, "models")
 
 COMPLETION_SCRIPT = os.path.join("bash_completion.d", "ml.bash")
+COMPLETION_INSTALL_PATH = "/etc/bash_completion.d"
 
 # Log files
 
@@ -74,12 +80,70 @@ ARCHIVE_DIR = os.path.join(MLINIT, ".archive")
 CONFIG_DIR = os.path.join(MLINIT, ".config")
 CONFIG_FILE = "config.yaml"
 
+# Parsed model package descriptions cached as JSON.  Bump the version
+# whenever the cached layout changes so stale caches are ignored.
+
+DESC_CACHE_DIR = os.path.join(MLINIT, ".description")
+DESC_CACHE_VERSION = 1
+
+# Meta data of the repository, kept to avoid parsing it again while
+# the repository reports that it is unchanged.
+
+REPO_CACHE_DIR = os.path.join(MLINIT, ".repository")
+
+# Downloaded model packages, kept to avoid downloading them again.
+
+DOWNLOAD_CACHE_DIR = os.path.join(MLINIT, ".download")
+
+# Model packages are downloaded in chunks of this many bytes, giving up
+# if the server does not respond for this many seconds.
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+# Zip package members are extracted with a buffer of up to this many
+# bytes, and packages larger than PARALLEL_EXTRACT_SIZE uncompressed
+# bytes are extracted with several threads.
+
+EXTRACT_BUFFER_SIZE = 1024 * 1024
+PARALLEL_EXTRACT_SIZE = 10 * 1024 * 1024
+
+# Files of at least this many bytes in a zip package, other than its
+# description, README and scripts, are left in the archive at install
+# and only extracted when the package is first configured or run.  Set
+# MLHUB_INLINE_THRESHOLD to 0 to extract everything at install.
+
+DEFER_EXTRACT_SIZE = 32 * 1024 * 1024
+try:
+    DEFER_EXTRACT_SIZE = max(0, int(os.environ["MLHUB_INLINE_THRESHOLD"]))
+except (KeyError, ValueError):
+    pass
+
+DEFERRED_ARCHIVE = ".mlhub-deferred.zip"
+DEFERRED_MANIFEST = ".mlhub-deferred.json"
+
+# Packages are staged for install in hidden tmp dirs under MLINIT.  Any
+# left by an install that was killed are removed by a later install once
+# they are this many seconds old.
+
+TMP_DIR_PREFIX = ".tmp-"
+TMP_DIR_STALE_AGE = 24 * 60 * 60
+
+# The number of threads used to extract a large package can be lowered,
+# for example on slow disks, through an environment variable.
+
+EXTRACT_THREADS = min(8, os.cpu_count() or 1)
+try:
+    EXTRACT_THREADS = max(1, int(os.environ["MLHUB_EXTRACT_THREADS"]))
+except (KeyError, ValueError):
+    pass
+
 # ------------------------------------------------------------------------
 # Application information.
 # ------------------------------------------------------------------------
 
 APP = "mlhub"  # The application name.
-APPX = "{}: ".format(APP)  # For error messages.
+APPX = f"{APP}: "  # For error messages.
 CMD = "ml"  # The command line tool.
 
 EXT_MLM = ".mlm"  # Archive filename extension
@@ -103,18 +167,16 @@ OPTIONS = {
         "action": "store_true",
     },
     "--init-dir": {
-        "help": "use this as the init dir instead of '{}'.".format(MLINIT)
+        "help": f"use this as the init dir instead of '{MLINIT}'."
     },
-    "--mlhub": {"help": "use this ML Hub instead of '{}'.".format(MLHUB)},
+    "--mlhub": {"help": f"use this ML Hub instead of '{MLHUB}'."},
     "--cmd": {
-        "help": "command display name instead of '{}'.".format(CMD),
+        "help": f"command display name instead of '{CMD}'.",
         "dest": "mlmetavar",
     },
     "--working-dir": {
         "alias": ["--wd"],
-        "help": "use this as the working dir instead of '{}'/<model>.".format(
-            MLINIT
-        ),
+        "help": f"use this as the working dir instead of '{MLINIT}'/<model>.",
     },
 }
 
@@ -179,6 +241,11 @@ COMMANDS = {
                 "help": 'Assume "yes" as answer to all prompts',
             },
             "-y": {"action": "store_true"},
+            "--no-cache": {
+                "action": "store_true",
+                "help": "Download the package even if a cached copy is "
+                "current",
+            },
             # 20220107 Not yet - is it really needed? Use RENAME.
             # "--name": {"help": "Local name of model."},
         },
@@ -279,36 +346,57 @@ COMMANDS = {
     # },
 }
 
-COMMANDS_USAGE = collections.OrderedDict()
-for cmd in collections.OrderedDict(COMMANDS):
-    argname = ""
-    if "argument" in COMMANDS[cmd]:
-        for k, v in COMMANDS[cmd]["argument"].items():
+# The options and commands are shared by the whole of mlhub, so they are
+# made read only rather than copied by those that use them.
+
+OPTIONS = types.MappingProxyType(OPTIONS)
+COMMANDS = types.MappingProxyType(COMMANDS)
+
+# The usage message is only needed for help, so it is built on demand
+# rather than on every start.
+
+
+@functools.lru_cache(maxsize=None)
+def get_commands_usage():
+    """Return the one line usage of each command, in the order of COMMANDS."""
+
+    usages = {}
+    for cmd, meta in COMMANDS.items():
+        argname = ""
+        for k, v in meta.get("argument", {}).items():
             if not k.startswith("-"):
                 argname = "<" + k + ">"
-                if "nargs" in v and v["nargs"] == "?":
+                if v.get("nargs") == "?":
                     argname = "[" + argname + "]"
                 break
-    usage = "  {:10s}{:^9s}  {}".format(
-        cmd, argname, COMMANDS[cmd]["description"]
-    )
-    COMMANDS_USAGE[cmd] = usage
+        usages[cmd] = "  {:10s}{:^9s}  {}".format(
+            cmd, argname, meta["description"]
+        )
+
+    return usages
+
+
+@functools.lru_cache(maxsize=None)
+def get_usage():
+    """Return the usage message."""
 
-USAGE = """Usage: {{}} [<options>] <command> [<command options>] [<model>]
+    usages = list(get_commands_usage().values())
+
+    return """Usage: {cmd} [<options>] <command> [<command options>] [<model>]
 
 Access machine learning models from the ML Hub.
 
 Global commands:
 
-{}
+{head}
 
-{}
+{tail}
 
-The ML Hub repository is '{{}}'.
+The ML Hub repository is '{hub}'.
 
-Models are installed into '{{}}'.
+Models are installed into '{init}'.
 
-This is version {{}} of {{}}.
+This is version {version} of {app}.
 
 Support, feedback, comments are welcome: support@mlhub.ai
 
@@ -325,9 +413,15 @@ List the available models from the repository with:
 
   $ ml available
 """.format(
-    "\n".join(list(COMMANDS_USAGE.values())[:3]),
-    "\n".join(list(COMMANDS_USAGE.values())[3:]),
-)
+        cmd=CMD,
+        head="\n".join(usages[:3]),
+        tail="\n".join(usages[3:]),
+        hub=MLHUB,
+        init=MLINIT,
+        version=VERSION,
+        app=APP,
+    )
+
 
 # ------------------------------------------------------------------------
 # File names
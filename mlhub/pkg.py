@@ -30,10 +30,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import functools
 import json
 import os
 import sys
-import requests
 import getpass
 import subprocess
 import re
@@ -41,6 +41,11 @@ import textwrap
 import platform
 from mlhub.utils import yes_or_no
 
+# Shared by every call to mlcat() rather than building a new wrapper for
+# each paragraph, as textwrap.fill() does.
+
+_WRAPPER = textwrap.TextWrapper()
+
 
 # ----------------------------------------------------------------------
 # Support Package Developers
@@ -52,22 +57,22 @@ def load_key(path):
     endpoint = None
     markchar = "'\" \t"
     with open(path, 'r') as file:
-        for line in file:
-            line = line.strip('\n')
-            pair = line.split('=')
-            if len(pair) == 2:
-                k = pair[0].strip(markchar).lower()
-                v = pair[1].strip(markchar)
-                if k == 'key':
-                    key = v
-                elif k == 'endpoint':
-                    endpoint = v
-            elif not line.startswith('#'):
-                line = line.strip(markchar)
-                if line.startswith('http'):
-                    endpoint = line
-                else:
-                    key = line
+        lines = file.read().splitlines()
+    for line in lines:
+        pair = line.split('=')
+        if len(pair) == 2:
+            k = pair[0].strip(markchar).lower()
+            v = pair[1].strip(markchar)
+            if k == 'key':
+                key = v
+            elif k == 'endpoint':
+                endpoint = v
+        elif not line.startswith('#'):
+            line = line.strip(markchar)
+            if line.startswith('http'):
+                endpoint = line
+            else:
+                key = line
     return key, endpoint
 
 
@@ -149,10 +154,9 @@ That information has been saved into the file:
                     key_or_other = ask_info(item, "")
                     data[item] = key_or_other
 
-            # Write data into json file
+            # Write data into json file as a single write.
             with open(key_file, "w") as outfile:
-                json.dump(data, outfile)
-            outfile.close()
+                outfile.write(json.dumps(data))
             print(msg_saved, file=sys.stderr)
     else:
         print(msg_request, file=sys.stderr)
@@ -186,10 +190,9 @@ That information has been saved into the file:
                     key_or_other = ask_info(item, "")
                     data[item] = key_or_other
 
-            # Write data into json file
+            # Write data into json file as a single write.
             with open(key_file, "w") as outfile:
-                json.dump(data, outfile)
-            outfile.close()
+                outfile.write(json.dumps(data))
             print(msg_saved, file=sys.stderr)
 
 
@@ -220,6 +223,8 @@ def azrequest(endpoint, url, subscription_key, request_data):
     Aim to generalise this to go into MLHUB to send request.
     """
 
+    import requests
+
     headers = {'Content-Type': 'application/json',
                'Ocp-Apim-Subscription-Key': subscription_key}
 
@@ -288,7 +293,7 @@ def mlcat(title="", text="", delim="=", begin="", end="\n"):
     # Split into paragraphs, fill each paragraph, convert back to a
     # list of strings, and join them together as the text to be
     # printed.
-    text = [l.strip() for l in list(map(textwrap.fill, text.split("\n\n")))]
+    text = [l.strip() for l in map(_WRAPPER.fill, text.split("\n\n"))]
     text = "\n\n".join(text)
     print(begin + sep + title + ttl_sep + sep + ttl_sep + text, end=end)
 
@@ -335,22 +340,20 @@ def mlpreview(fname,
 
 # From Simon Zhao's azface package on github.
 
+_URL_REGEX = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+'
+    r'(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+
 def is_url(url):
     """Check if url is a valid URL."""
 
-    urlregex = re.compile(
-        r'^(?:http|ftp)s?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+'
-        r'(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-
-    if re.match(urlregex, url) is not None:
-        return True
-    else:
-        return False
+    return _URL_REGEX.match(url) is not None
 
 
 def get_cmd_cwd():
@@ -370,6 +373,14 @@ def get_cmd_cwd():
     return cmd_cwd
 
 
+@functools.lru_cache(maxsize=32)
+def _load_private(path, mtime):
+    """Load the private information file, cached on its modification time."""
+
+    with open(path) as f:
+        return json.load(f)
+
+
 def get_private(file_path="private.json", server=None):
     """Return a list of private information
 
@@ -383,41 +394,40 @@ def get_private(file_path="private.json", server=None):
     """
     path = os.path.join(os.getcwd(), file_path)
     if os.path.exists(path):
-        with open(path) as f:
-            private_info = json.load(f)
-            values = list(private_info.values())
-
-            # The MLHub yaml includes
-            #
-            # private:
-            #   Azure Speech: key*, location
-
-            if any(isinstance(el, dict) for el in values):
-                for item in values:
-                    for i in list(item.values()):
-                        if i == "":
-                            sys.exit("Your private information is blank. "
-                                     "Please run ml configure <model> to "
-                                     "paste your private information.")
-                if server is None:
-                    return list(values[0].values())
-                else:
-                    if server in list(private_info.keys()):
-                        return list(private_info[server].values())
-                    else:
-                        sys.exit("The server's name doesn't exist.\n"
-                                 "Please make sure you have the correct name.")
-
-            # private:key*, location
-            # In this case, the values = [asdfghj(key), australia(location)]
-
-            else:
-                for item in values:
-                    if item == "":
+        private_info = _load_private(path, os.path.getmtime(path))
+        values = list(private_info.values())
+
+        # The MLHub yaml includes
+        #
+        # private:
+        #   Azure Speech: key*, location
+
+        if any(isinstance(el, dict) for el in values):
+            for item in values:
+                for i in list(item.values()):
+                    if i == "":
                         sys.exit("Your private information is blank. "
                                  "Please run ml configure <model> to "
                                  "paste your private information.")
-                return values
+            if server is None:
+                return list(values[0].values())
+            else:
+                if server in list(private_info.keys()):
+                    return list(private_info[server].values())
+                else:
+                    sys.exit("The server's name doesn't exist.\n"
+                             "Please make sure you have the correct name.")
+
+        # private:key*, location
+        # In this case, the values = [asdfghj(key), australia(location)]
+
+        else:
+            for item in values:
+                if item == "":
+                    sys.exit("Your private information is blank. "
+                             "Please run ml configure <model> to "
+                             "paste your private information.")
+            return values
 
     else:
         sys.exit("Please run ml configure <model> to "
@@ -22,8 +22,10 @@ R_DEVTOOLS_DEPS='
   libgit2-dev
 '
 
+# The install path is set by ml configure from mlhub/constants.py.
+
 COMPLETION_SCRIPT=bash_completion.d/ml.bash
-COMPLETION_INSTALL_PATH=/etc/bash_completion.d
+COMPLETION_INSTALL_PATH=${_MLHUB_COMPLETION_INSTALL_PATH:?}
 
 ######################################################################
 # Upgrade pip if possible
@@ -148,10 +150,11 @@ sudo Rscript -e 'devtools::install_github("mlhubber/mlhub", quiet=TRUE)'
 # Configure bash completion
 ######################################################################
 
+# The model and command completion lists are then refreshed by ml
+# configure itself once this script succeeds.
+
 COMMANDS=(
   "sudo install -m 0644 ${COMPLETION_SCRIPT} ${COMPLETION_INSTALL_PATH}"
-  "ml available > /dev/null"
-  "ml installed > /dev/null"
 )
 
 echo -e '\n*** Configuring bash completion - may require password for admin privileges ...'
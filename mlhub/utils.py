@@ -29,35 +29,31 @@
 # THE SOFTWARE.
 
 import base64
-import cgi
 import collections
-import distro
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
 import shutil
 import site
-import requests
 import sys
 import tarfile
 import tempfile
+import threading
+import time
 import urllib.error
 import urllib.parse
-import urllib.request
-import uuid
 import yaml
 import yamlordereddictloader
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
-import gdown
 
 
 from abc import ABC, abstractmethod
-from rapidfuzz import fuzz
-from rapidfuzz import process as fuzzprocess
 from mlhub.constants import (
-    APP,
     APPX,
     ARCHIVE_DIR,
     BASH_CMD,
@@ -66,12 +62,23 @@ from mlhub.constants import (
     COMMANDS,
     COMPLETION_COMMANDS,
     COMPLETION_DIR,
+    COMPLETION_INSTALL_PATH,
     COMPLETION_MODELS,
+    COMPLETION_SCRIPT,
     CONDA_ENV_NAME,
     CONFIG_DIR,
     CONFIG_FILE,
+    DEFERRED_ARCHIVE,
+    DEFERRED_MANIFEST,
+    DESC_CACHE_DIR,
+    DESC_CACHE_VERSION,
     DESC_YAML,
     DESC_YML,
+    DOWNLOAD_CACHE_DIR,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_TIMEOUT,
+    EXTRACT_BUFFER_SIZE,
+    EXTRACT_THREADS,
     EXT_AIPK,
     EXT_MLM,
     LOG_DIR,
@@ -81,15 +88,43 @@ from mlhub.constants import (
     MLHUB_YAML,
     MLINIT,
     MSG_INCOMPATIBLE_PYTHON_ENV,
+    PARALLEL_EXTRACT_SIZE,
+    REPO_CACHE_DIR,
     RSCRIPT_CMD,
     SYS_PYTHON_CMD,
     SYS_PYTHON_PKG_USAGE,
-    USAGE,
+    TMP_DIR_PREFIX,
+    TMP_DIR_STALE_AGE,
     VERSION,
     WORKING_DIR,
+    get_usage,
 )
 
 
+# The safe loader, parsing with libyaml when PyYAML has it.
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# The loader of yamlordereddictloader, which keeps the order of the
+# entries in a mapping, but parsing with libyaml when PyYAML has it.
+
+if hasattr(yaml, "CLoader"):
+
+    class OrderedLoader(yaml.CLoader):
+        construct_yaml_map = yamlordereddictloader.construct_yaml_map
+        construct_mapping = yamlordereddictloader.construct_mapping
+
+    for tag in ("tag:yaml.org,2002:map", "tag:yaml.org,2002:omap"):
+        OrderedLoader.add_constructor(tag, OrderedLoader.construct_yaml_map)
+
+else:
+    OrderedLoader = yamlordereddictloader.Loader
+
+# A scheme anywhere in a name marks it as a url, see is_url.
+
+RE_URL = re.compile("https?:")
+
+
 # ----------------------------------------------------------------------
 # MLHUB repo and model package
 # ----------------------------------------------------------------------
@@ -108,32 +143,175 @@ def get_repo(mlhub):
     return repo
 
 
+@functools.lru_cache(maxsize=8)
 def get_repo_meta_data(repo):
-    """Read the repositories meta data file and return as a list."""
+    """Read the repositories meta data file and return as a list.
+
+    The meta data is fetched at most once per repository within a
+    process.  The returned list is shared and must not be modified.
+    """
 
     repo = get_repo(repo)
 
+    for name in (META_YAML, META_YML):
+        meta_list = load_repo_yaml(repo + name)
+        if meta_list is not None:
+            return meta_list, repo
+
+    logger = logging.getLogger(__name__)
+    logger.error("Repo connection problem.")
+    raise RepoAccessException(repo)
+
+
+@functools.lru_cache(maxsize=8)
+def get_repo_meta_index(repo):
+    """Index the repositories meta data by model name.
+
+    Return the index, mapping each name to its first entry, and the key
+    missing from the first malformed entry or None.  The index is shared
+    and must not be modified.
+    """
+
+    meta_list, _ = get_repo_meta_data(repo)
+
+    index = {}
+    missing = None
+    for entry in meta_list:
+        try:
+            name = entry["meta"]["name"]
+        except KeyError as e:
+            if missing is None:
+                missing = e.args[0]
+            continue
+        index.setdefault(name, entry)
+
+    return index, missing
+
+
+def load_repo_yaml(url):
+    """Fetch and parse the YAML documents at <url> of the repository.
+
+    The parsed documents are cached on disk as JSON along with the ETag
+    and Last-Modified headers of the response, unless they do not survive
+    a round trip through JSON.  While the response is fresh
+    by its Cache-Control max-age the cached documents are returned
+    without asking the server.  After that the next fetch is a
+    conditional request, and when the server answers that nothing has
+    changed the cached documents are returned without parsing.  None is
+    returned if <url> cannot be fetched.
+    """
+
+    import requests
+    import urllib.request
+
+    logger = logging.getLogger(__name__)
+
+    if not url.startswith(("http://", "https://")):  # Such as file://
+        try:
+            content = urllib.request.urlopen(url).read()
+        except urllib.error.URLError:
+            return None
+        return list(yaml.load_all(content, Loader=SafeLoader))
+
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    cache = os.path.join(REPO_CACHE_DIR, key + ".json")
+
     try:
-        url = repo + META_YAML
-        meta_list = list(
-            yaml.load_all(
-                urllib.request.urlopen(url).read(), Loader=yaml.SafeLoader
-            )
+        with open(cache, "r") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        cached = None
+    if not isinstance(cached, dict) or "data" not in cached:
+        cached = None
+
+    if cached is not None and cached.get("expires", 0) > time.time():
+        logger.debug("Use fresh cached {}".format(url))
+        return cached["data"]
+
+    headers = {}
+    if cached is not None:
+        if cached.get("etag") is not None:
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified") is not None:
+            headers["If-Modified-Since"] = cached["modified"]
+
+    try:
+        response = get_http_session().get(
+            url, headers=headers, timeout=DOWNLOAD_TIMEOUT
         )
-    except urllib.error.URLError:
+    except requests.RequestException:
+        logger.debug("Failed to fetch {}".format(url), exc_info=True)
+        return None
+
+    if response.status_code == 304 and cached is not None:
+        logger.debug("Use cached {}".format(url))
+        data = cached["data"]
+        etag, modified = cached.get("etag"), cached.get("modified")
+    elif response.status_code != 200:
+        logger.debug("Failed to fetch {}: {}".format(
+            url, response.status_code
+        ))
+        return None
+    else:
+        data = list(yaml.load_all(response.content, Loader=SafeLoader))
+        etag = response.headers.get("ETag")
+        modified = response.headers.get("Last-Modified")
+
+    # Save the documents if they were fetched and can be validated or
+    # reused, or to record how much longer the cached copy is fresh.
+
+    expires = get_expiry_time(response.headers)
+    if expires or (
+            response.status_code == 200
+            and (etag is not None or modified is not None)
+    ):
+        cached = {
+            "etag": etag,
+            "modified": modified,
+            "expires": expires,
+            "data": data,
+        }
         try:
-            url = repo + META_YML
-            meta_list = list(
-                yaml.load_all(
-                    urllib.request.urlopen(url).read(), Loader=yaml.SafeLoader
-                )
-            )
-        except urllib.error.URLError:
-            logger = logging.getLogger(__name__)
-            logger.error("Repo connection problem.", exc_info=True)
-            raise RepoAccessException(repo)
+            content = json.dumps(cached)
+            if json.loads(content) != cached:
+                raise ValueError("not preserved by JSON")
+            os.makedirs(REPO_CACHE_DIR, exist_ok=True)
+            write_file_atomic(cache, content)
+        except (OSError, TypeError, ValueError):
+            logger.debug("Failed to cache {}".format(url), exc_info=True)
+
+    return data
+
+
+def get_expiry_time(headers):
+    """Return the time until which a response with <headers> is fresh.
+
+    This is given by the max-age of the Cache-Control header less the Age
+    of the response.  0 is returned if the response is not to be reused
+    without asking the server.
+    """
+
+    max_age = None
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        name = name.lower()
+        if name in ("no-cache", "no-store"):
+            return 0
+        if name == "max-age":
+            try:
+                max_age = int(value.strip('"'))
+            except ValueError:
+                return 0
+
+    if not max_age:
+        return 0
 
-    return meta_list, repo
+    try:
+        age = int(headers.get("Age", 0))
+    except ValueError:
+        age = 0
+
+    return time.time() + max_age - age
 
 
 def print_meta_line(entry):
@@ -147,19 +325,12 @@ def print_meta_line(entry):
     except KeyError:
         title = meta["description"]
 
-    # One line message.
-
-    max_title = 12
-    max_descr = 56
+    # One line message, with the name truncated to 12 characters and
+    # the title to 56.
 
-    long = ""
-    if len(title) > max_descr:
-        long = "..."
+    long = "..." if len(title) > 56 else ""
 
-    formatter = "{0:<TITLE.TITLE} {1:^6} {2:<DESCR.DESCR}{3}".replace(
-        "TITLE", str(max_title)
-    ).replace("DESCR", str(max_descr))
-    print(formatter.format(name, version, title, long))
+    print(f"{name:<12.12} {version:^6} {title:<56.56}{long}")
 
 
 def get_version(model=None):
@@ -171,41 +342,131 @@ def get_version(model=None):
 
 
 def check_model_installed(model):
-    """Check if model installed."""
+    """Check if model installed and return its package directory."""
 
     path = get_package_dir(model)
 
     logger = logging.getLogger(__name__)
     logger.debug("Check if package {} is installed at: {}".format(model, path))
 
-    if not os.path.exists(path):
+    if not os.path.isdir(path):
         raise ModelNotInstalledException(model)
 
-    return True
+    return path
 
 
 def load_description(model):
-    """Load description of the <model>."""
+    """Load description of the <model>.
+
+    The parsed description is cached as JSON under DESC_CACHE_DIR and
+    reused for as long as the YAML file it was read from is unchanged.
+    """
 
     desc = get_available_pkgyaml(model)
-    entry = read_mlhubyaml(desc)
+    if is_url(desc):
+        return read_mlhubyaml(desc)
+
+    source = get_description_source(desc)
+    cache = get_description_cache_file(model)
+
+    entry = read_description_cache(cache, source)
+    if entry is None:
+        entry = read_mlhubyaml(desc)
+        write_description_cache(cache, source, entry)
 
     return entry
 
 
+def cache_description(model, entry):
+    """Cache the <entry> read from the description of the installed <model>.
+
+    This lets install pass on the description it has already parsed so
+    that the next command to load it does not parse it again.
+    """
+
+    desc = get_available_pkgyaml(model)
+    write_description_cache(
+        get_description_cache_file(model), get_description_source(desc), entry
+    )
+
+
+def get_description_source(desc):
+    """Identify the YAML file <desc> by its path, mtime and size."""
+
+    stat = os.stat(desc)
+    return [os.path.abspath(desc), stat.st_mtime_ns, stat.st_size]
+
+
+def get_description_cache_file(model):
+    """Return the path of the cached description of the <model>."""
+
+    return os.path.join(
+        DESC_CACHE_DIR, os.path.basename(os.path.normpath(model)) + ".json"
+    )
+
+
+def read_description_cache(cache, source):
+    """Return the cached description if it was built from <source>.
+
+    <source> identifies the YAML file by its path, modification time and
+    size.  None is returned if there is no usable cache.
+    """
+
+    try:
+        with open(cache, "r") as file:
+            data = json.load(file, object_pairs_hook=collections.OrderedDict)
+    except (OSError, ValueError):
+        return None
+
+    if (
+            data.get("version") != DESC_CACHE_VERSION
+            or data.get("source") != source
+    ):
+        return None
+
+    return data.get("entry")
+
+
+def write_description_cache(cache, source, entry):
+    """Cache the parsed description <entry> read from <source>.
+
+    Descriptions that do not survive a round trip through JSON, such as
+    those with dates or non-string keys, are not cached.  Failure to
+    write the cache is not an error.
+    """
+
+    data = collections.OrderedDict(
+        [("version", DESC_CACHE_VERSION), ("source", source), ("entry", entry)]
+    )
+
+    try:
+        content = json.dumps(data)
+    except (TypeError, ValueError):
+        return
+
+    if json.loads(content, object_pairs_hook=collections.OrderedDict) != data:
+        return
+
+    try:
+        os.makedirs(DESC_CACHE_DIR, exist_ok=True)
+        write_file_atomic(cache, content)
+    except OSError:
+        logger = logging.getLogger(__name__)
+        logger.debug(
+            "Description not cached: {}".format(cache), exc_info=True
+        )
+
+
 def read_mlhubyaml(name):
     """Read description from a specified local yaml file or the url of a
 yaml file."""
 
     try:
 
-        # Use yamlordereddictloader to keep the order of entries
-        # specified inside YAML file, because the order of commands
-        # matters.
+        # Use OrderedLoader to keep the order of entries specified
+        # inside YAML file, because the order of commands matters.
 
-        entry = yaml.load(
-            read_repo_raw_file(name), Loader=yamlordereddictloader.Loader
-        )
+        entry = yaml.load(read_repo_raw_file(name), Loader=OrderedLoader)
 
     except (yaml.composer.ComposerError, yaml.scanner.ScannerError):
 
@@ -235,25 +496,27 @@ def get_model_info_from_repo(model, repo):
 
     url = None
     version = None
+    index, missing = get_repo_meta_index(repo)
     meta_list, repo = get_repo_meta_data(repo)
 
-    # Find the first matching entry in the meta data.
+    # Look up the first matching entry in the meta data.
+
+    entry = index.get(model)
+    if entry is None and missing is not None:
+        raise MalformedPackagesDotYAMLException(missing, model)
 
     try:
-        for entry in meta_list:
+        if entry is not None:
             meta = entry["meta"]
-            if model == meta["name"]:
-                if "yaml" in meta:
-                    url = meta["yaml"]
-                else:
-                    url = meta["url"]
-
-                # If url refers to an archive, its version must be known.
+            if "yaml" in meta:
+                url = meta["yaml"]
+            else:
+                url = meta["url"]
 
-                if is_archive_file(url):
-                    version = meta["version"]
+            # If url refers to an archive, its version must be known.
 
-                break
+            if is_archive_file(url):
+                version = meta["version"]
     except KeyError as e:
         raise MalformedPackagesDotYAMLException(e.args[0], model)
 
@@ -291,13 +554,16 @@ def interpret_mlm_name(mlm):
     return model, version
 
 
-def get_available_pkgyaml(url):
+def get_available_pkgyaml(url, names=None):
     """Return the available package yaml file path.
 
     Possible options are MLHUB.yaml, DESCRIPTION.yaml or
     DESCRIPTION.yml.  If both exist, MLHUB.yaml takes precedence.
     Path can be a path to the package directory or a URL to the top
     level of the package repo.
+
+    If <names>, the files just unpacked into the package directory, is
+    given then it is consulted before looking on disk.
     """
 
     yaml_list = [MLHUB_YAML, DESC_YAML, DESC_YML]
@@ -317,16 +583,24 @@ def get_available_pkgyaml(url):
     if is_url(url):
         param = yaml_list[0]
         for x in yaml_list:
+
+            # Only the headers are needed, asked for on the connection
+            # that the package download will then use.
+
             try:
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                req = urllib.request.Request(x, headers=headers)
-                if urllib.request.urlopen(req).status == 200:
+                if get_url_headers(x).status_code == 200:
                     logger.debug("YAML: {}".format(x))
                     return x
-            except urllib.error.URLError:
+            except ModelURLAccessException:
                 continue
     else:
         param = url
+        if names is not None:
+            names = set(names)
+            for x in yaml_list:
+                if os.path.basename(x) in names:
+                    logger.debug("YAML: {}".format(x))
+                    return x
         for x in yaml_list:
             if os.path.exists(x):
                 logger.debug("YAML: {}".format(x))
@@ -351,6 +625,44 @@ def drop_newline(paragraph):
     return re.sub("\n$", "", paragraph)
 
 
+def trim_readme(text):
+    """Tidy up the plain text rendering of a README.
+
+    Drop a leading line of badges, drop everything from a 'Usage' line
+    onwards, and squeeze runs of blank lines into a single blank line.
+    """
+
+    lines = []
+    for i, line in enumerate(text.splitlines()):
+        if line == "Usage":
+            break
+        if i == 0 and line.startswith("["):
+            continue
+        lines.append(line)
+
+    if not lines:
+        return ""
+
+    return re.sub("\n{3,}", "\n\n", "\n".join(lines) + "\n").lstrip("\n")
+
+
+def version_key(version):
+    """Return a tuple of the numbers in a version string for comparison.
+
+Only the leading dotted numbers are used, stopping at the first
+component that is not a number, so that a pre-release like '1.0rc1' or
+a suffixed '1.0-2020' never compares above '1.1' or as newer than
+'1.0'.  Trailing zeros are dropped so that '1.0' and '1.0.0' compare
+equal.
+    """
+
+    match = re.match(r"\d+(?:\.\d+)*", str(version).strip())
+    key = [int(n) for n in match.group().split(".")] if match else []
+    while key and key[-1] == 0:
+        key.pop()
+    return tuple(key)
+
+
 def lower_first_letter(sentence):
     """Lowercase the first letter of a sentence."""
 
@@ -369,7 +681,7 @@ def drop_archive_ext(name):
 def is_url(name):
     """Check if name is a url."""
 
-    return re.findall("http[s]?:", name)
+    return RE_URL.search(name) is not None
 
 def is_google_drive_url(url):
     """Check if name is a google drive / google docs url."""
@@ -380,58 +692,227 @@ def is_google_drive_url(url):
 def get_url_filename(url):
     """Obtain the file name from URL or None if not available."""
 
+    import cgi
+
     filename = os.path.basename(url).split("?")[0]
 
+    response = get_url_headers(url)
+    if response.status_code == 404:
+        print(f"\nmlhub: Missing url: {url}\n       please notify package author.")
+        return None
+    elif not response.ok:
+        raise ModelURLAccessException(url)
+
+    info = response.headers.get("Content-Disposition")
+    if info:
+        _, params = cgi.parse_header(info)
+        if "filename" in params:
+            filename = params["filename"]
+
+    return filename or None
+
+
+@functools.lru_cache(maxsize=None)
+def get_url_headers(url):
+    """Return the response to a request for just the headers of <url>.
+
+The request goes through the shared HTTP session so the connection is
+left open for the download that follows.  Servers that refuse a HEAD
+request are asked with a GET whose body is not read.  The response is
+kept so that the headers of a URL are only requested once.
+    """
+
+    import requests
+
     # Specify header to avoid a 403 from some sites.
     headers = {'User-Agent':
                    'Mozilla/5.0 (X11; Linux x86_64) ' +
                    'AppleWebKit/537.36 (KHTML, like Gecko) ' +
                    'Chrome/81.0.4044.138 Safari/537.36'}
-    req = urllib.request.Request(url, headers=headers)
+    session = get_http_session()
     try:
-        info = urllib.request.urlopen(req).getheader("Content-Disposition")
-    except urllib.error.HTTPError as err:
-        if err.code == 404:
-            print(f"\nmlhub: Missing url: {url}\n       please notify package author.")
-            return None
+        response = session.head(
+            url, headers=headers, allow_redirects=True,
+            timeout=DOWNLOAD_TIMEOUT,
+        )
+        if not response.ok and response.status_code != 404:
+            with session.get(
+                    url, headers=headers, stream=True,
+                    timeout=DOWNLOAD_TIMEOUT,
+            ) as response:
+                pass
+    except requests.RequestException:
+        raise ModelURLAccessException(url)
 
-    if info:
-        _, params = cgi.parse_header(info)
-        if "filename" in params:
-            filename = params["filename"]
+    return response
 
-    return filename or None
 
+@functools.lru_cache(maxsize=None)
+def get_http_session():
+    """Return the HTTP session shared by the downloads of a process.
 
-def download_model_pkg(url, local, pkgfile, quiet):
-    """Download the model package mlm or zip file from <url> to <local>."""
+Connections to a host are kept alive and pooled so that later requests
+to the same host avoid another TCP and TLS handshake.  Failures to
+connect are retried a few times, but a request the server has started
+to answer is not.
+    """
+
+    import requests
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, read=0),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # Identify as a browser as some sites refuse python clients.
+
+    session.headers["User-Agent"] = "Mozilla/5.0"
+
+    return session
+
+
+def download_model_pkg(url, local, pkgfile, quiet, cache=True):
+    """Download the model package mlm or zip file from <url> to <local>.
+
+The package is fetched with a single streamed GET, its headers giving
+the size.  A copy is kept in the download cache, keyed by the URL,
+along with the ETag the server gave it.  If <cache> is set and the
+server still reports the same ETag and size, the cached copy is used
+without a GET.  The headers of the URL are then only requested if the
+install has not already asked for them.
+    """
+
+    import requests
 
     if not quiet:
         print("Package " + url + "\n")
 
-    meta = urllib.request.urlopen(url)
-    if meta.status != 200:
+    cached = get_download_cache_file(url, pkgfile)
+    if cache and os.path.exists(cached):
+        response = get_url_headers(url)
+        if response.ok and is_download_cache_current(
+                cached,
+                response.headers.get("ETag"),
+                response.headers.get("Content-Length"),
+        ):
+            if not quiet:
+                print("Using the cached copy of '{}' ...\n".format(pkgfile))
+            link_or_copy(cached, local)
+            return
+
+    try:
+        response = get_http_session().get(
+            url, stream=True, timeout=DOWNLOAD_TIMEOUT
+        )
+    except requests.RequestException:
         raise ModelURLAccessException(url)
 
-    # Content-Length is not always necessarily available.
+    with response:
+        if response.status_code != 200:
+            raise ModelURLAccessException(url)
 
-    dsize = meta.getheader("Content-Length")
-    if dsize is not None:
-        dsize = "{:,}".format(int(dsize))
+        # Content-Length is not always necessarily available.
 
-    if not quiet:
-        msg = "Downloading '{}'".format(pkgfile)
-        if dsize is not None:
-            msg += " ({} bytes)".format(dsize)
-        msg += " ...\n"
-        print(msg)
+        length = response.headers.get("Content-Length")
+        etag = response.headers.get("ETag")
+
+        if not quiet:
+            msg = "Downloading '{}'".format(pkgfile)
+            if length is not None:
+                msg += " ({:,} bytes)".format(int(length))
+            msg += " ...\n"
+            print(msg)
+
+        # Download the archive from the URL.
+
+        try:
+            with open(local, "wb") as file:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+        except requests.RequestException as error:
+            raise ModelDownloadHaltException(url, str(error).lower())
+
+    if etag is not None:
+        write_download_cache(local, cached, etag)
+
+
+def download_url(url, path):
+    """Download <url> into the file <path> through the shared HTTP session.
+
+Return False, without writing <path>, if the server does not give the
+file.
+    """
+
+    import requests
+
+    try:
+        response = get_http_session().get(
+            url, stream=True, timeout=DOWNLOAD_TIMEOUT
+        )
+    except requests.RequestException:
+        return False
+
+    with response:
+        if not response.ok:
+            return False
 
-    # Download the archive from the URL.
+        try:
+            with open(path, "wb") as file:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+        except requests.RequestException as error:
+            raise ModelDownloadHaltException(url, str(error).lower())
+
+    return True
+
+
+def get_download_cache_file(url, pkgfile):
+    """Return the path where the package downloaded from <url> is cached."""
+
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(DOWNLOAD_CACHE_DIR, key, pkgfile)
+
+
+def is_download_cache_current(cached, etag, length):
+    """Check if <cached> matches the <etag> and <length> of the server copy.
+
+Without an ETag from the server the cached copy is never trusted.
+    """
+
+    if etag is None:
+        return False
 
     try:
-        urllib.request.urlretrieve(url, local)
-    except urllib.error.URLError as error:
-        raise ModelDownloadHaltException(url, error.reason.lower())
+        with open(cached + ".etag", "r") as file:
+            if file.read() != etag:
+                return False
+        size = os.path.getsize(cached)
+    except OSError:
+        return False
+
+    return length is None or size == int(length)
+
+
+def write_download_cache(local, cached, etag):
+    """Keep the downloaded package <local> with its <etag>.
+
+The cached copy is a hard link to <local> where possible, so caching
+the package costs no extra copy of it.
+    """
+
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        link_or_copy(local, cached)
+        write_file_atomic(cached + ".etag", etag)
+    except OSError:
+        logger = logging.getLogger(__name__)
+        logger.debug("Failed to cache '{}'.".format(cached), exc_info=True)
+
 
 # ----------------------------------------------------------------------
 # Get repo default branch
@@ -441,6 +922,8 @@ def download_model_pkg(url, local, pkgfile, quiet):
 def get_default_branch(owner, repo, repo_type):
     """Get the repository default branch."""
 
+    import requests
+
     rep = f"{owner}/{repo}"
 
     if repo_type == "github":
@@ -487,7 +970,9 @@ def _create_dir(path, error_msg, exception):
     return path
 
 
-def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
+def unpack_with_promote(
+        file, dest, valid_name=None, remove_dst=True, defer_size=None
+):
     """Unzip <file> into the directory <dest>.
 
     If all files in the zip file are under a top level directory,
@@ -497,7 +982,13 @@ def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
     first, otherwise, extracted files will co-exist with those already in
     <dest>.
 
-    Return whether promotion happened and the top level dir if did.
+    If <defer_size> is given, members of a zip file of at least that
+    many bytes are left in the archive until extract_deferred is called
+    on <dest>, see defer_members.
+
+    Return whether promotion happened, the top level dir if did, the
+    list of extracted files and their total uncompressed size in bytes
+    as recorded in the archive.
     """
 
     logger = logging.getLogger(__name__)
@@ -513,13 +1004,21 @@ def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
         valid_name = file
 
     if is_mlm_zip(valid_name):
-        opener, lister_name, appender_name = (
+        opener, lister_name, appender_name, info_name, size_name = (
             zipfile.ZipFile,
             "namelist",
             "write",
+            "infolist",
+            "file_size",
         )
     else:
-        opener, lister_name, appender_name = tarfile.open, "getnames", "add"
+        opener, lister_name, appender_name, info_name, size_name = (
+            tarfile.open,
+            "getnames",
+            "add",
+            "getmembers",
+            "size",
+        )
 
     # Unpack <file>.
 
@@ -527,7 +1026,20 @@ def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
 
         # Check if all files are under a top dir.
 
-        file_list = getattr(pkg_file, lister_name)()
+        if isinstance(pkg_file, zipfile.ZipFile):
+            infos = [
+                info
+                for info in pkg_file.infolist()
+                if not is_junk_member(info.filename)
+            ]
+            file_list = [info.filename for info in infos]
+            size = sum(info.file_size for info in infos)
+        else:
+            file_list = getattr(pkg_file, lister_name)()
+            size = sum(
+                getattr(info, size_name)
+                for info in getattr(pkg_file, info_name)()
+            )
         first_segs = [x.split(os.path.sep)[0] for x in file_list]
         if (len(file_list) == 1 and os.path.sep in file_list[0]) or (
                 len(file_list) != 1
@@ -540,8 +1052,32 @@ def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
         if not promote:  # All files are at the top level.
 
             logger.debug("Extract {} directly into {}".format(file, dest))
-            pkg_file.extractall(dest)
-            return False, top_dir, file_list
+            deferred = extract_all(
+                pkg_file, dest, size, defer_size=defer_size
+            )
+            if deferred:
+                defer_members(file, dest, deferred)
+            return False, top_dir, file_list, size
+
+        elif isinstance(pkg_file, zipfile.ZipFile):
+
+            # All files are under a top dir, which is dropped from the
+            # path of each member as it is extracted.
+
+            logger.debug(
+                "Extract {} without top dir into {}".format(file, dest)
+            )
+            deferred = extract_all(
+                pkg_file, dest, size, strip=top_dir, defer_size=defer_size
+            )
+            if deferred:
+                defer_members(file, dest, deferred)
+            file_list = [
+                x.split(os.path.sep, 1)[1]
+                for x in file_list
+                if os.path.sep in x and not x.endswith(os.path.sep)
+            ]
+            return True, top_dir, file_list, size
 
         else:  # All files are under a top dir.
             logger.debug(
@@ -552,7 +1088,7 @@ def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
 
                 # Extract file.
 
-                pkg_file.extractall(tmpdir)
+                extract_all(pkg_file, tmpdir, size)
 
                 with tempfile.TemporaryDirectory() as tmpdir2:
 
@@ -582,7 +1118,213 @@ def unpack_with_promote(file, dest, valid_name=None, remove_dst=True):
                     ) as new_pkg_file:
                         new_pkg_file.extractall(dest)
 
-            return True, top_dir, file_list
+            return True, top_dir, file_list, size
+
+
+def extract_all(pkg_file, dest, size, strip=None, defer_size=None):
+    """Extract all members of the opened archive <pkg_file> into <dest>.
+
+Zip members are copied out with a buffer of up to EXTRACT_BUFFER_SIZE
+bytes, rather than the small default buffer of ZipFile.extractall.  A
+zip file of more than PARALLEL_EXTRACT_SIZE bytes is decompressed by a
+pool of EXTRACT_THREADS threads, since zlib releases the GIL while it
+works.  All directories are created first so the threads do not race
+to make them.
+
+For a zip file, macOS metadata is skipped, see is_junk_member, the top
+level directory <strip> is dropped from the path of each member, and
+members of at least <defer_size> bytes other than the package
+description, README and scripts are not extracted.  Return a dict
+mapping the name of each member not extracted to its path relative to
+<dest>.
+    """
+
+    if not isinstance(pkg_file, zipfile.ZipFile):
+        pkg_file.extractall(dest)
+        return {}
+
+    members = []
+    deferred = {}
+    made = set()
+    for info in pkg_file.infolist():
+        name = info.filename
+        if is_junk_member(name):
+            continue
+        if strip is not None:
+            name = name.split("/", 1)[1] if "/" in name else ""
+        path = get_zip_member_path(name, dest)
+        if path is None:
+            continue
+        folder = path if info.is_dir() else os.path.dirname(path)
+        if folder not in made:
+            os.makedirs(folder, exist_ok=True)
+            made.add(folder)
+        if info.is_dir():
+            continue
+        if defer_size and is_deferrable(info, defer_size):
+            deferred[info.filename] = os.path.relpath(path, dest)
+        else:
+            members.append((info, path))
+
+    extract_zip_members(pkg_file, members, size)
+
+    return deferred
+
+
+def is_junk_member(name):
+    """Check if the zip member <name> is metadata left by macOS.
+
+Such members, the __MACOSX resource forks and .DS_Store files, are not
+part of the package and are not extracted.
+    """
+
+    parts = name.split("/")
+    return parts[0] == "__MACOSX" or parts[-1] == ".DS_Store"
+
+
+def extract_zip_members(pkg_file, members, size):
+    """Extract the (info, path) <members> of the opened zip <pkg_file>.
+
+The parent directory of each path must already exist.  <size> is the
+total uncompressed size, which decides whether threads are used.
+    """
+
+    def extract(member, zip_file=pkg_file):
+        info, path = member
+        buffer_size = min(max(info.file_size, 1), EXTRACT_BUFFER_SIZE)
+        with zip_file.open(info) as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target, buffer_size)
+
+    if size <= PARALLEL_EXTRACT_SIZE or EXTRACT_THREADS == 1:
+        for member in members:
+            extract(member)
+        return
+
+    # Give each thread its own handle on the zip file where possible, as
+    # reads through a shared handle are serialised by a lock.
+
+    local = threading.local()
+    handles = []
+
+    def extract_own(member):
+        if pkg_file.filename is None:
+            return extract(member)
+        if not hasattr(local, "zip_file"):
+            local.zip_file = zipfile.ZipFile(pkg_file.filename)
+            handles.append(local.zip_file)
+        return extract(member, local.zip_file)
+
+    try:
+        with ThreadPoolExecutor(max_workers=EXTRACT_THREADS) as pool:
+            list(pool.map(extract_own, members))  # Re-raise any failure.
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def get_zip_member_path(name, dest):
+    """Return where the zip member <name> is extracted to under <dest>.
+
+As with ZipFile.extract, drive letters and any empty, '.' or '..'
+components are dropped so nothing is written outside <dest>.  None is
+returned if nothing of the name remains.
+    """
+
+    name = os.path.splitdrive(name.replace("/", os.path.sep))[1]
+    parts = [
+        x
+        for x in name.split(os.path.sep)
+        if x not in ("", os.path.curdir, os.path.pardir)
+    ]
+
+    return os.path.join(dest, *parts) if parts else None
+
+
+def is_deferrable(info, defer_size):
+    """Check if the zip member <info> can be left in the archive for now.
+
+Only large files are deferred, and never the package description, the
+README or a script, which the install and other commands read.
+    """
+
+    if info.file_size < defer_size:
+        return False
+
+    base = os.path.basename(info.filename)
+    return not (
+        base in (MLHUB_YAML, DESC_YAML, DESC_YML)
+        or base.startswith("README")
+        or base.endswith((".sh", ".py", ".R"))
+    )
+
+
+def defer_members(archive, dest, deferred):
+    """Keep <archive> in <dest> to extract its <deferred> members later.
+
+An archive mlhub owns, downloaded into an install's tmp dir or the
+download cache, is hard linked where possible rather than copied.  Both
+places only ever replace a file, see link_or_copy, so the kept archive
+is never changed through the link.  A user's own archive, even one
+kept in MLINIT, is always copied so that rebuilding it in place does
+not change what was installed.  The members still to extract are
+recorded in a manifest beside it.
+    """
+
+    kept = os.path.join(dest, DEFERRED_ARCHIVE)
+    if is_owned_archive(archive):
+        link_or_copy(archive, kept)
+    else:
+        shutil.copyfile(archive, kept)
+
+    write_file_atomic(
+        os.path.join(dest, DEFERRED_MANIFEST), json.dumps(deferred)
+    )
+
+
+def is_owned_archive(archive):
+    """Check if <archive> is in an install's tmp dir or the download cache."""
+
+    try:
+        rel = os.path.relpath(
+            os.path.realpath(archive), os.path.realpath(MLINIT)
+        )
+    except ValueError:  # On another drive.
+        return False
+
+    top = rel.split(os.sep)[0]
+    return top == os.path.basename(DOWNLOAD_CACHE_DIR) or (
+        top.startswith(TMP_DIR_PREFIX) and rel != top
+    )
+
+
+def extract_deferred(path):
+    """Extract any members of a package left in its archive at install.
+
+<path> is the installed package directory.  The kept archive and its
+manifest are removed once every member has been extracted.
+    """
+
+    manifest = os.path.join(path, DEFERRED_MANIFEST)
+    try:
+        with open(manifest, "r") as file:
+            deferred = json.load(file)
+    except FileNotFoundError:
+        return
+
+    logger = logging.getLogger(__name__)
+    logger.info("Extract deferred files into {}".format(path))
+
+    archive = os.path.join(path, DEFERRED_ARCHIVE)
+    with zipfile.ZipFile(archive) as pkg_file:
+        members = [
+            (pkg_file.getinfo(name), os.path.join(path, relpath))
+            for name, relpath in deferred.items()
+        ]
+        size = sum(info.file_size for info, _ in members)
+        extract_zip_members(pkg_file, members, size)
+
+    os.remove(manifest)
+    os.remove(archive)
 
 
 def remove_file_or_dir(path):
@@ -595,6 +1337,57 @@ def remove_file_or_dir(path):
             shutil.rmtree(path)
 
 
+def write_file_atomic(path, content):
+    """Write <content>, str or bytes, to the file <path> in a single step.
+
+    The content is written to a temporary file alongside <path> which
+    then replaces it, so readers never see a partially written file.  The
+    file is given the permissions open() would create it with, rather
+    than the private ones of the temporary file.
+    """
+
+    mode = "wb" if isinstance(content, bytes) else "w"
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, mode) as file:
+            file.write(content)
+        os.chmod(tmp, 0o666 & ~get_umask())
+        os.replace(tmp, path)
+    except OSError:
+        remove_file_or_dir(tmp)
+        raise
+
+
+@functools.lru_cache(maxsize=None)
+def get_umask():
+    """Return the file mode creation mask of the process.
+
+    The mask can only be read by setting it, so it is put straight back.
+    """
+
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def link_or_copy(src, dst):
+    """Make <dst> a hard link to <src>, or a copy if it cannot be linked.
+
+Any existing <dst> is removed first rather than written over, since it
+may itself be a link shared with another file.
+    """
+
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
 def make_symlink(src, dst):
     """Make a symbolic link from src to dst."""
 
@@ -620,14 +1413,23 @@ files under dst_dir."""
 
 
 def dir_size(dirpath):
-    """Get total size of dirpath."""
+    """Get total size of dirpath.
 
-    return sum(
-        [
-            sum(map(lambda f: os.path.getsize(os.path.join(pth, f)), files))
-            for pth, dirs, files in os.walk(dirpath)
-        ]
-    )
+As with os.walk, symbolic links to directories are not followed.
+    """
+
+    total = 0
+    stack = [dirpath]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        stack.append(entry.path)
+                else:
+                    total += entry.stat().st_size
+
+    return total
 
 
 def ends_with_mlm(name):
@@ -672,7 +1474,7 @@ def is_description_file(name):
 
 
 def print_usage():
-    print(USAGE.format(CMD, MLHUB, get_init_dir(), VERSION, APP))
+    print(get_usage())
 
 
 def print_model_cmd_help(entry, cmd):
@@ -991,7 +1793,7 @@ def install_python_deps(deps, model, source="pip", yes=False):
             category = "file"
             deps = first_dep[list(first_dep)[0]]
             with open(os.path.join(pkg_dir, deps), "r") as file:
-                name = yaml.load(file, Loader=yaml.SafeLoader)["name"]
+                name = yaml.load(file, Loader=SafeLoader)["name"]
             update_conda_env_name(model, name)
         elif (list(first_dep)[0] == "name"):
             # For environment name, store for later use.
@@ -1146,6 +1948,8 @@ def install_file_deps(deps, model, downloadir=None, key=None, yes=False):
         ~/.mlhub/<pkg>/<files inside scripts>
     """
 
+    import uuid
+
     # TODO: Add download progress indicator, or use
     #       wget --quiet --show-progress <url> 2>&1
     #
@@ -1307,12 +2111,11 @@ def install_file_deps(deps, model, downloadir=None, key=None, yes=False):
                 if not reuse:
                     os.makedirs(os.path.dirname(archive), exist_ok=True)
 
-                    try:
-                        if (is_google_drive_url(location)): # Use GDown if its a big file from Google Drive
-                            gdown.download(location, archive, quiet=False, fuzzy= True)
-                        else:
-                            urllib.request.urlretrieve(location, archive)
-                    except urllib.error.HTTPError:
+                    if (is_google_drive_url(location)): # Use GDown if its a big file from Google Drive
+                        import gdown
+
+                        gdown.download(location, archive, quiet=False, fuzzy= True)
+                    elif not download_url(location, archive):
                         print(f"\nmlhub: Failed to get file dependency: {location}" +
                             "\n       Please notify package author.")
                         continue
@@ -1329,7 +2132,7 @@ def install_file_deps(deps, model, downloadir=None, key=None, yes=False):
                         )
                     )
                     if filetype != "dir":
-                        _, _, file_list = unpack_with_promote(
+                        _, _, file_list, _ = unpack_with_promote(
                             archive, cache, remove_dst=False
                         )
                     else:
@@ -1618,6 +2421,8 @@ class GitHubURL(RepoTypeURL):
     def get_res_type(self):
         """Query if the URL is a file or directory or a repo."""
 
+        import urllib.request
+
         if self.path is None:
             self.res_type = "repo"
             self.composed_url = self.compose_repo_zip_url()
@@ -1641,6 +2446,8 @@ class GitHubURL(RepoTypeURL):
         return self.res_type, self.composed_url
 
     def read_raw_file(self):
+        import urllib.request
+
         if self.url.lower().split("/")[2] == "api.github.com":
             res = json.loads(urllib.request.urlopen(self.url).read())
             return base64.b64decode(res["content"])
@@ -1750,6 +2557,8 @@ class GitLabURL(RepoTypeURL):
     def get_res_type(self):
         """Query if location is a file or directory or a repo on GitHub."""
 
+        import urllib.request
+
         if self.path is None:
             self.res_type = "repo"
             self.composed_url = self.compose_repo_zip_url()
@@ -1779,6 +2588,8 @@ class GitLabURL(RepoTypeURL):
         return self.res_type, self.composed_url
 
     def read_raw_file(self):
+        import urllib.request
+
         headers = {'User-Agent': 'Mozilla/5.0'}
         req = urllib.request.Request(self.url, headers=headers)
         return urllib.request.urlopen(req).read()
@@ -1869,6 +2680,8 @@ class BitbucketURL(RepoTypeURL):
             )
 
     def get_res_type(self):
+        import urllib.request
+
         if self.path is None:
             self.res_type = "repo"
             self.composed_url = self.compose_repo_zip_url()
@@ -1893,6 +2706,8 @@ class BitbucketURL(RepoTypeURL):
         return self.res_type, self.composed_url
 
     def read_raw_file(self):
+        import urllib.request
+
         return urllib.request.urlopen(self.url).read()
 
     def interpret(self):
@@ -1954,6 +2769,8 @@ class BitbucketURL(RepoTypeURL):
 def read_repo_raw_file(name):
     """Read the raw file from a repo of a hosting service."""
 
+    import urllib.request
+
     if not is_url(name):
         return open(name)
     else:
@@ -1986,6 +2803,52 @@ def create_init():
     )
 
 
+def create_tmp_dir():
+    """Create a temporary dir inside the init dir and return it.
+
+    Keeping it on the same filesystem as the installed packages means an
+    extracted package can be moved into place with a simple rename.  The
+    dir is hidden so that it is not listed as an installed model.
+    """
+
+    init = create_init()
+    remove_stale_tmp_dirs(init)
+    try:
+        return tempfile.TemporaryDirectory(prefix=TMP_DIR_PREFIX, dir=init)
+    except OSError:
+        logger = logging.getLogger(__name__)
+        logger.error(
+            "Tmp dir creation failed in: {}".format(init), exc_info=True
+        )
+        raise MLTmpDirCreateException(init)
+
+
+def remove_stale_tmp_dirs(init):
+    """Remove the tmp dirs in <init> left by an install that was killed.
+
+    An install that ends, even with an error or Ctrl-C, removes its own
+    tmp dir.  Only those unchanged for TMP_DIR_STALE_AGE seconds are
+    removed, so the tmp dir of another install still running is kept.
+    """
+
+    cutoff = time.time() - TMP_DIR_STALE_AGE
+    try:
+        entries = list(os.scandir(init))
+    except OSError:
+        return
+
+    for entry in entries:
+        try:
+            if (
+                    entry.name.startswith(TMP_DIR_PREFIX)
+                    and entry.is_dir(follow_symlinks=False)
+                    and entry.stat(follow_symlinks=False).st_mtime < cutoff
+            ):
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            pass
+
+
 def get_package_name():
     """Return the model pkg name.
 
@@ -2100,7 +2963,7 @@ Packages.yaml in current working dir.
         packagesyaml (str): YAML file which will hold meta data in all MLHUB.yaml.
     """
 
-    entry = yaml.load(open(mlmodelsyaml), Loader=yaml.SafeLoader)
+    entry = yaml.load(open(mlmodelsyaml), Loader=SafeLoader)
     model_list = list(entry.keys())
     model_list.sort()
     failed_models = []
@@ -2160,7 +3023,7 @@ Packages.yaml in current working dir.
         packagesyaml (str): YAML file which will hold meta data in all MLHUB.yaml.
     """
 
-    meta = yaml.load(open(mlmodelsyaml), Loader=yaml.SafeLoader)
+    meta = yaml.load(open(mlmodelsyaml), Loader=SafeLoader)
     model_list = list(meta.keys())
     model_list.sort()
     failed_models = []
@@ -2187,7 +3050,7 @@ Packages.yaml in current working dir.
                 continue
 
             try:
-                entry = yaml.load(content, Loader=yamlordereddictloader.Loader)
+                entry = yaml.load(content, Loader=OrderedLoader)
             except (yaml.composer.ComposerError, yaml.scanner.ScannerError):
                 failed_models.append(model)
                 continue
@@ -2211,7 +3074,7 @@ def update_config(model, entry):
 
     if os.path.exists(config_file):
         with open(config_file, "r") as file:
-            old_entry = yaml.load(file, Loader=yaml.SafeLoader)
+            old_entry = yaml.load(file, Loader=SafeLoader)
             old_entry.update(entry)
             entry = old_entry
 
@@ -2241,7 +3104,7 @@ def get_config(model, name):
     config_file = get_package_config_file(model)
     if os.path.exists(config_file):
         with open(config_file, "r") as file:
-            entry = yaml.load(file, Loader=yaml.SafeLoader)
+            entry = yaml.load(file, Loader=SafeLoader)
         if name in entry:
             return entry[name]
 
@@ -2265,6 +3128,20 @@ def get_sys_python_pkg_usage(model):
 
 
 def get_py_pkg_path_env(model):
+    """Return shell exports putting the model's python packages on the
+paths."""
+
+    python_pkg_base, python_pkg_bin = get_py_pkg_paths(model)
+
+    exports = f'export PATH="{python_pkg_bin}:$PATH"; '
+    exports += f'export PYTHONPATH="{python_pkg_base}"; '
+
+    return (exports)
+
+
+def get_py_pkg_paths(model):
+    """Return the base and bin dirs of the model's python packages."""
+
     # 20200719 Version 20.1.1 of pip3 is installed on Ubuntu 20.04
     # after `pip3 install --upgrade pip`. This uses
     # site.getsitepackages()[0]
@@ -2284,8 +3161,8 @@ def get_py_pkg_path_env(model):
     # location for pip3 to install the packages. Thus that is also on
     # PYTHONPATH. The bin is also .python/bin.
 
-    python_pkg_base = os.path.sep.join([get_package_dir(model), ".python"])
-    python_pkg_bin = python_pkg_base + "/bin"
+    python_pkg_base = os.path.join(get_package_dir(model), ".python")
+    python_pkg_bin = os.path.join(python_pkg_base, "bin")
 
     # TODO: Make sure to document:
     #     $ sudo apt-get install -y python3-pip
@@ -2302,10 +3179,7 @@ def get_py_pkg_path_env(model):
         if get_sys_python_pkg_usage(model):
             print_on_stderr(MSG_INCOMPATIBLE_PYTHON_ENV, model)
 
-    exports = f'export PATH="{python_pkg_bin}:$PATH"; '
-    exports += f'export PYTHONPATH="{python_pkg_base}"; '
-
-    return (exports)
+    return python_pkg_base, python_pkg_bin
 
 
 # ----------------------------------------------------------------------
@@ -2342,13 +3216,17 @@ def update_completion_list(completion_file, new_words):
             old_words = {line.strip() for line in file if line.strip()}
             logger.debug("Old Completion words: {}".format(old_words))
 
+        # Leave the file alone if it already has every word.
+
+        if new_words <= old_words:
+            return
+
         words = old_words | new_words
     else:
         words = new_words
 
     logger.debug("All completion words: {}".format(words))
-    with open(completion_file, "w") as file:
-        file.write("\n".join(words))
+    write_file_atomic(completion_file, "\n".join(words))
 
 
 def update_model_completion(new_words):
@@ -2388,6 +3266,25 @@ def get_model_completion_list():
     return get_completion_list(COMPLETION_MODELS)
 
 
+def completion_outdated(path):
+    """Check if the bash completion script under <path> needs installing.
+
+This is the case when the installed copy is missing or older, as tested
+by the configure script before it installs the completion script.
+    """
+
+    installed = os.path.join(
+        COMPLETION_INSTALL_PATH, os.path.basename(COMPLETION_SCRIPT)
+    )
+    try:
+        installed_mtime = os.stat(installed).st_mtime
+    except OSError:
+        return True
+
+    script = os.path.join(path, COMPLETION_SCRIPT)
+    return os.stat(script).st_mtime > installed_mtime
+
+
 # -----------------------------------------------------------------------
 # Fuzzy match helper
 # -----------------------------------------------------------------------
@@ -2396,6 +3293,9 @@ def get_model_completion_list():
 def find_best_match(misspelled, candidates):
     """Find the best matched word with <misspelled> in <candidates>."""
 
+    from rapidfuzz import fuzz
+    from rapidfuzz import process as fuzzprocess
+
     best_match = fuzzprocess.extractOne(
         misspelled, candidates, scorer=fuzz.ratio
     )
@@ -2507,13 +3407,16 @@ class OptionAdder(object):
         self.logger = logging.getLogger(__name__)
 
     def add_option(self, option):
-        opt = self.options[option]
+
+        # The alias is taken from a copy so that <self.options>, which is
+        # normally the read only OPTIONS, is left as it is.
+
+        opt = dict(self.options[option])
         opt_alias = [
             option,
         ]
         if "alias" in opt:
-            opt_alias += opt["alias"]
-            del opt["alias"]
+            opt_alias += opt.pop("alias")
         self.logger.debug(
             "Add command line optional argument: {} - {}".format(
                 opt_alias, opt
@@ -2581,6 +3484,30 @@ def print_error_exit(msg, *param, exitcode=1):
 # ----------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=None)
+def host_id():
+    """Return the ID of the Linux distribution, like 'ubuntu'.
+
+The ID is read from os-release, as it does not change while mlhub runs.
+The distro package is only imported if there is no os-release file.
+    """
+
+    for name in ("/etc/os-release", "/usr/lib/os-release"):
+        try:
+            with open(name) as file:
+                for line in file:
+                    key, _, value = line.strip().partition("=")
+                    if key == "ID":
+                        return value.strip("\"'").lower()
+            return ""
+        except OSError:
+            continue
+
+    import distro
+
+    return distro.id()
+
+
 def configure(path, script, quiet):
     """Run the provided configure scripts and handle errors and output."""
 
@@ -2588,7 +3515,7 @@ def configure(path, script, quiet):
 
     # For now only tested/working with Ubuntu
 
-    if distro.id() in ["debian", "ubuntu"]:
+    if host_id() in ["debian", "ubuntu"]:
         conf = os.path.join(path, script)
         if os.path.exists(conf):
             interp = interpreter(script)
@@ -2614,18 +3541,57 @@ def configure(path, script, quiet):
 def interpreter(script):
     """Determine the correct interpreter for the given script name."""
 
+    intrprt, env = interpreter_cmd(script)
+
+    return " ".join(["{}={}".format(k, v) for k, v in env.items()] + intrprt)
+
+
+def interpreter_cmd(script):
+    """Determine the interpreter command line for the given script name.
+
+    Return the command as a list of arguments along with a dict of the
+    environment variables the interpreter needs.
+    """
+
     (root, ext) = os.path.splitext(script)
     ext = ext.strip()
     if ext == ".sh":
-        intrprt = BASH_CMD
+        return [BASH_CMD], {}
     elif ext == ".R":
-        intrprt = "R_LIBS=./R {}".format(RSCRIPT_CMD)
+        return [RSCRIPT_CMD], {"R_LIBS": "./R"}
     elif ext == ".py":
-        intrprt = sys.executable
+        return [sys.executable], {}
     else:
         raise UnsupportedScriptExtensionException(ext)
 
-    return intrprt
+
+def run_with_stderr_tail(command, tail=64 * 1024, **kwargs):
+    """Run <command>, collecting its stderr in a file, and keep its end.
+
+The stderr of the command goes to a temporary file, which spills to disk
+rather than memory however much the command writes, and is shown once
+the command exits.  Only the command itself is waited for, so processes
+it leaves running, such as a viewer, do not hold up the return.  Other
+keyword arguments are passed to subprocess.Popen.  Return the exit
+status of the command and the last <tail> bytes of its stderr.
+    """
+
+    out = getattr(sys.stderr, "buffer", sys.stderr)
+
+    with tempfile.TemporaryFile() as errors:
+        with subprocess.Popen(command, stderr=errors, **kwargs) as proc:
+            returncode = proc.wait()
+
+        errors.seek(0)
+        sys.stderr.flush()
+        shutil.copyfileobj(errors, out)
+        out.flush()
+
+        size = errors.tell()
+        errors.seek(max(0, size - tail))
+        kept = errors.read()
+
+    return returncode, kept
 
 
 def yes_or_no(msg, *params, yes=True, certain=False, third_choice=False):